@@ -2,75 +2,428 @@ import sqlite3
 import datetime
 import logging
 import os
-from typing import List, Dict, Any, Optional
+import sys
+import json
+import math
+import argparse
+import atexit
+import queue
+from logging.handlers import QueueHandler, QueueListener
+import time
+import itertools
+import pathlib
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import List, Dict, Any, Optional, ClassVar
+
+try:
+    import duckdb  # Optional: only used for analytic reports (BankDatabase.analytics_conn)
+except ImportError:
+    duckdb = None
 
 # --- Configuration & Logging Setup ---
 DB_NAME = 'bank_data.db'
 LOGS_DIR = 'logs'
 LOG_FILE = os.path.join(LOGS_DIR, 'bank_errors.log')
+# Queued transaction rows are written in one executemany once this many accumulate
+TXN_FLUSH_THRESHOLD = 500
+# Rows per multi-row INSERT statement in BankDatabase.bulk_insert
+BULK_INSERT_CHUNK = 50
+# bulk_insert drops the target table's indexes and rebuilds them once when loading at least this many rows
+BULK_INDEX_REBUILD_THRESHOLD = 10000
+# Records handed to each bulk_save call by the `ingest` command
+INGEST_CHUNK_SIZE = 1000
+# Read-only connections kept by the pool; reads that find none idle go through the writer
+DEFAULT_POOL_READERS = 5
+# Prepared statements kept per connection by the sqlite3 binding (its default is 100)
+STATEMENT_CACHE_SIZE = 256
+# Rows kept per table by RecordCache in front of BaseEntity._fetch_record
+RECORD_CACHE_SIZE = 1024
+# Page size for new database files; existing files keep theirs until BankDatabase.vacuum()
+PAGE_SIZE = 8192
+# Per-connection tuning applied to the writer and to every pooled reader:
+# 64 MiB page cache and 256 MiB of memory-mapped reads
+CONNECTION_PRAGMAS = '''
+    PRAGMA temp_store = MEMORY;
+    PRAGMA cache_size = -65536;
+    PRAGMA mmap_size = 268435456;
+'''
+# SELECT text per (table, id_field, columns), registered by each BaseEntity subclass at class
+# creation so _fetch_record never formats SQL and every read reuses one cached statement
+_FETCH_SQL: Dict[tuple, str] = {}
+# Computed by SQLite on read (VIRTUAL: no storage); shared by CREATE TABLE and the ALTER for older files
+CUSTOMER_FULL_NAME_COLUMN = "full_name TEXT GENERATED ALWAYS AS (first_name || ' ' || last_name) VIRTUAL"
+# Secondary indexes, grouped by table: (index name, indexed columns)
+TABLE_INDEXES = {
+    'customers': [('idx_customers_fullname', 'full_name COLLATE NOCASE')],
+    'accounts': [('idx_accounts_customer', 'customer_id')],
+    'transactions': [('idx_txn_account_ts', 'account_id, timestamp DESC')],
+    'loans': [('idx_loans_customer', 'customer_id')],
+    'credit_cards': [('idx_cards_customer', 'customer_id')],
+}
 
 # Ensure the logs directory exists
 os.makedirs(LOGS_DIR, exist_ok=True)
 
 # Configure logging: INFO messages go to both console and file.
 # Warnings and Errors are captured in the file.
+# Records are queued and written by a background listener so callers never block on
+# file or console I/O. Per-operation confirmations are logged at DEBUG.
+_log_queue = queue.SimpleQueue()
+_log_listener = QueueListener(_log_queue, logging.FileHandler(LOG_FILE, mode='a'), logging.StreamHandler())
+_log_listener.start()
+atexit.register(_log_listener.stop)
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(LOG_FILE, mode='a'),
-        logging.StreamHandler()
-    ]
+    handlers=[QueueHandler(_log_queue)]
 )
 
-# --- 1. Database Management Class ---
+# --- Coded Enumerations ---
+# Stored as small integers; the readable label is only produced for display.
+
+class CodedEnum(IntEnum):
+    """Integer-coded enumeration with a display label (e.g. CHECKING -> 'Checking')."""
+    @property
+    def label(self) -> str:
+        return self.name.capitalize()
+
+    @classmethod
+    def coerce(cls, value) -> 'CodedEnum':
+        """Accepts a member, its integer code (int or numeric text) or its label, case-insensitively."""
+        if isinstance(value, str) and not value.strip().isdigit():
+            try:
+                return cls[value.strip().upper()]
+            except KeyError:
+                raise ValueError(f"'{value}' is not a valid {cls.__name__}") from None
+        return cls(int(value))
+
+    @classmethod
+    def sql_codes(cls) -> str:
+        """Comma-separated codes for a CHECK (... IN (...)) constraint."""
+        return ", ".join(str(member.value) for member in cls)
+
+    @classmethod
+    def sql_from_label(cls, column: str) -> str:
+        """SQL expression mapping a label stored in column (e.g. 'Checking') to its code."""
+        cases = " ".join(f"WHEN '{member.name.lower()}' THEN {member.value}" for member in cls)
+        return f"CASE lower({column}) {cases} ELSE {column} END"
+
+class AccountType(CodedEnum):
+    CHECKING = 1
+    SAVINGS = 2
+
+class TxnType(CodedEnum):
+    DEPOSIT = 1
+    WITHDRAWAL = 2
+
+class LoanStatus(CodedEnum):
+    PENDING = 1
+    APPROVED = 2
+    PAID = 3
+
+# Columns that files created before the coded schema stored as TEXT, with the SQL that converts
+# each old value. create_tables rebuilds such a table once, copying its rows through these.
+LEGACY_COLUMN_CONVERSIONS = {
+    'accounts': {'account_type': AccountType.sql_from_label('account_type')},
+    'transactions': {
+        'txn_type': TxnType.sql_from_label('txn_type'),
+        # Local-time ISO text to epoch seconds (millisecond precision). Only text shaped like a
+        # date is converted: julianday() reads a number as a Julian day, so epoch values (REAL or
+        # numeric text) are copied unchanged, as are values SQLite cannot parse.
+        'timestamp': ("CASE WHEN typeof(timestamp) = 'text' AND timestamp GLOB '[0-9][0-9][0-9][0-9]-*' "
+                      "THEN COALESCE((julianday(timestamp, 'utc') - 2440587.5) * 86400.0, timestamp) "
+                      "ELSE timestamp END"),
+    },
+    'loans': {'status': LoanStatus.sql_from_label('status')},
+}
+
+# --- 1. Database Management Classes ---
+
+class ConnectionPool:
+    """
+    One shared writer connection guarded by write_lock, plus up to max_readers
+    read-only connections that are checked out for a single read and returned
+    afterwards, so short-lived threads never pin one. With WAL enabled, readers
+    never wait on the writer.
+    """
+    def __init__(self, db_name: str, max_readers: int = DEFAULT_POOL_READERS):
+        # check_same_thread=False is necessary for multi-threaded access (e.g., Flask)
+        self.writer = sqlite3.connect(db_name, check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
+        self.write_lock = threading.RLock()
+        # In-memory databases are private to one connection, so they cannot be shared with readers
+        self._reader_uri = None
+        if db_name not in (':memory:', ''):
+            self._reader_uri = pathlib.Path(db_name).resolve().as_uri() + '?mode=ro'
+        self._max_readers = max_readers
+        # Every open reader, and the subset currently idle (LIFO keeps the warmest one in use)
+        self._readers: List[sqlite3.Connection] = []
+        self._idle = queue.LifoQueue()
+        self._readers_lock = threading.Lock()
+
+    def _open_reader(self) -> Optional[sqlite3.Connection]:
+        """Opens a new read-only connection, or returns None if max_readers are already open."""
+        with self._readers_lock:
+            if len(self._readers) >= self._max_readers:
+                return None
+            conn = sqlite3.connect(self._reader_uri, uri=True, check_same_thread=False,
+                                   cached_statements=STATEMENT_CACHE_SIZE)
+            conn.executescript(CONNECTION_PRAGMAS)
+            # Compile every registered lookup up front; an id of NULL matches no rows
+            for sql in _FETCH_SQL.values():
+                conn.execute(sql, (None,)).fetchall()
+            self._readers.append(conn)
+            return conn
+
+    @contextmanager
+    def reader(self):
+        """
+        Checks out an idle read-only connection for the block and returns it to the
+        pool afterwards. Yields None when reads must use the writer (in-memory
+        database, or every reader is busy).
+        """
+        conn = None
+        if self._reader_uri is not None:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._open_reader()
+        try:
+            yield conn
+        finally:
+            if conn is not None:
+                with self._readers_lock:
+                    # Readers discarded by close_readers() while checked out are closed on return
+                    if conn in self._readers:
+                        self._idle.put(conn)
+                    else:
+                        conn.close()
+
+    def close_readers(self):
+        """
+        Closes every pooled reader; new ones are opened on demand by later reads.
+        Readers checked out at the time are closed when their read finishes.
+        """
+        with self._readers_lock:
+            while True:
+                try:
+                    self._idle.get_nowait().close()
+                except queue.Empty:
+                    break
+            self._readers.clear()
+
+    def close(self):
+        """Closes every pooled reader and the writer."""
+        self.close_readers()
+        with self.write_lock:
+            self.writer.close()
+
+
+class RecordCache:
+    """
+    Per-table LRU of rows returned by BaseEntity._fetch_record. Each table has a
+    generation counter bumped on invalidation; a fetch only stores its row if the
+    generation is unchanged, so a read that raced a commit never caches stale data.
+    Commits by other connections or processes are detected through each reading
+    connection's PRAGMA data_version (see sync()), which clears every table.
+    """
+    MISS = object()
+
+    def __init__(self, maxsize: int = RECORD_CACHE_SIZE):
+        self._maxsize = maxsize
+        self._rows: Dict[str, OrderedDict] = {}
+        self._generations: Dict[str, int] = {}
+        # Bumped by invalidate_all(); part of every generation so it covers tables never seen
+        self._epoch = 0
+        # Last PRAGMA data_version seen per connection (keyed by id())
+        self._data_versions: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, table: str, key: tuple):
+        """Returns the cached row for key, or RecordCache.MISS."""
+        with self._lock:
+            rows = self._rows.get(table)
+            if rows is None or key not in rows:
+                return self.MISS
+            rows.move_to_end(key)
+            return rows[key]
+
+    def generation(self, table: str) -> tuple:
+        """Returns the table's current generation, to be passed back to put()."""
+        with self._lock:
+            return (self._epoch, self._generations.get(table, 0))
+
+    def put(self, table: str, key: tuple, row: tuple, generation: tuple):
+        """Caches row unless the table was invalidated after generation was read."""
+        with self._lock:
+            if (self._epoch, self._generations.get(table, 0)) != generation:
+                return
+            rows = self._rows.setdefault(table, OrderedDict())
+            rows[key] = row
+            rows.move_to_end(key)
+            if len(rows) > self._maxsize:
+                rows.popitem(last=False)
+
+    def invalidate(self, table: str):
+        """Drops every cached row of table."""
+        with self._lock:
+            self._generations[table] = self._generations.get(table, 0) + 1
+            self._rows.pop(table, None)
+
+    def invalidate_all(self):
+        """Drops every cached row of every table."""
+        with self._lock:
+            self._epoch += 1
+            self._rows.clear()
+
+    def sync(self, conn_key: int, data_version: int):
+        """
+        Records a connection's PRAGMA data_version, which changes whenever another
+        connection commits. A changed value, or a connection not seen before
+        (its baseline is unknown), clears the cache.
+        """
+        with self._lock:
+            changed = self._data_versions.get(conn_key) != data_version
+            self._data_versions[conn_key] = data_version
+        if changed:
+            self.invalidate_all()
+
+    def forget_connections(self):
+        """Drops the recorded data versions (and every row) once the connections they belong to are closed."""
+        with self._lock:
+            self._data_versions.clear()
+        self.invalidate_all()
+
 
 class BankDatabase:
     """
     Handles all SQLite connection and table creation logic.
     All database operations are encapsulated here or within BaseEntity methods.
+    conn/cursor belong to the pool's writer and are only used while holding pool.write_lock.
     """
-    def __init__(self, db_name: str = DB_NAME):
-        """Initializes the database connection and ensures tables exist."""
-        # check_same_thread=False is necessary for multi-threaded access (e.g., Flask)
-        self.conn = sqlite3.connect(db_name, check_same_thread=False) 
+    def __init__(self, db_name: str = DB_NAME, pool_readers: int = DEFAULT_POOL_READERS):
+        """Initializes the connection pool and ensures tables exist."""
+        self.db_name = db_name
+        self.pool = ConnectionPool(db_name, pool_readers)
+        # DuckDB connection attached read-only to the same file, opened on first report
+        self._analytics_conn = None
+        # Set once opening it fails (e.g. the sqlite extension cannot be downloaded) so it is not retried
+        self._analytics_failed = False
+        self._analytics_lock = threading.Lock()
+        self.conn = self.pool.writer
         self.cursor = self.conn.cursor()
+        # Set while a transaction() block is open so DML defers its commit to the block
+        self.in_transaction_scope = False
+        self._scope_failed = False
+        self._scope_thread: Optional[int] = None
+        # Epoch time captured when the current transaction() block began; shared by its ledger rows
+        self.scope_timestamp: Optional[float] = None
+        # (account_id, txn_type, amount, timestamp) rows waiting for Account.flush_queued_transactions
+        self.pending_transactions: List[tuple] = []
+        self.record_cache = RecordCache()
+        # Tables written inside the current transaction() block; their cache is cleared when it ends
+        self._dirty_tables: set = set()
+        self.configure_pragmas()
         self.create_tables()
-        
+        self.warm_statement_cache()
+
+    def configure_pragmas(self):
+        """Switches the connection to WAL mode and relaxes fsync to one per checkpoint."""
+        try:
+            # page_size only applies before the first table exists, so it must precede WAL
+            self.cursor.executescript(f'''
+                PRAGMA page_size = {PAGE_SIZE};
+                PRAGMA journal_mode = WAL;
+                PRAGMA synchronous = NORMAL;
+            ''' + CONNECTION_PRAGMAS)
+            # journal_mode silently stays on the old value if WAL is unsupported (e.g. :memory:)
+            self.cursor.execute("PRAGMA journal_mode")
+            mode = self.cursor.fetchone()[0]
+            if mode.lower() != 'wal':
+                logging.warning(f"WAL journal mode not available; using '{mode}' instead.")
+        except sqlite3.Error as e:
+            logging.error(f"Failed to configure database pragmas: {e}")
+
+    def vacuum(self):
+        """
+        Rebuilds the database file, applying PAGE_SIZE to databases created before it
+        was set. WAL files cannot change page size, so the journal is switched to
+        DELETE for the rebuild and back to WAL afterwards. Returns True on success.
+        """
+        with self.pool.write_lock:
+            # Leaving WAL needs exclusive access, so the pooled readers are closed first;
+            # their replacements may reuse the ids the record cache keyed data versions by
+            self.pool.close_readers()
+            self.record_cache.forget_connections()
+            try:
+                # journal_mode reports the mode actually in effect; it stays 'wal' if another connection is open
+                mode = self.cursor.execute("PRAGMA journal_mode = DELETE").fetchone()[0]
+                if mode.lower() != 'delete':
+                    logging.error(f"Failed to vacuum database: journal mode is still '{mode}' (database in use).")
+                    return False
+                self.cursor.execute(f"PRAGMA page_size = {PAGE_SIZE}")
+                self.cursor.execute("VACUUM")
+                logging.info("Database vacuumed.")
+                return True
+            except sqlite3.Error as e:
+                logging.error(f"Failed to vacuum database: {e}")
+                return False
+            finally:
+                try:
+                    # Fetching the result finishes the statement, which would otherwise keep the file locked
+                    self.cursor.execute("PRAGMA journal_mode = WAL").fetchone()
+                except sqlite3.Error as e:
+                    logging.error(f"Failed to restore WAL journal mode: {e}")
+
     def create_tables(self):
-        """Creates all necessary tables for the banking system if they do not exist."""
+        """
+        Creates all necessary tables for the banking system if they do not exist,
+        migrating tables left by older versions. Runs as one transaction, so a failed
+        migration leaves the file as it was.
+        """
         try:
+            self.cursor.execute("BEGIN")
+            legacy_tables = self.retire_legacy_tables()
+
             # Customers Table
-            self.cursor.execute('''
+            self.cursor.execute(f'''
                 CREATE TABLE IF NOT EXISTS customers (
                     customer_id INTEGER PRIMARY KEY AUTOINCREMENT,
                     first_name TEXT NOT NULL,
                     last_name TEXT NOT NULL,
                     address TEXT,
-                    join_date TEXT NOT NULL
+                    join_date TEXT NOT NULL,
+                    {CUSTOMER_FULL_NAME_COLUMN}
                 )
             ''')
+            # Files created before full_name existed get it added in place (table_xinfo lists generated columns)
+            self.cursor.execute("PRAGMA table_xinfo(customers)")
+            if 'full_name' not in [column[1] for column in self.cursor.fetchall()]:
+                self.cursor.execute(f"ALTER TABLE customers ADD COLUMN {CUSTOMER_FULL_NAME_COLUMN}")
             
             # Accounts Table
-            self.cursor.execute('''
+            self.cursor.execute(f'''
                 CREATE TABLE IF NOT EXISTS accounts (
                     account_id INTEGER PRIMARY KEY AUTOINCREMENT,
                     customer_id INTEGER NOT NULL,
                     balance REAL NOT NULL,
-                    account_type TEXT NOT NULL,
+                    account_type INTEGER NOT NULL CHECK (account_type IN ({AccountType.sql_codes()})),
                     is_active INTEGER NOT NULL DEFAULT 1,
                     FOREIGN KEY (customer_id) REFERENCES customers (customer_id)
                 )
             ''')
             
             # Transactions Table
-            self.cursor.execute('''
+            self.cursor.execute(f'''
                 CREATE TABLE IF NOT EXISTS transactions (
                     txn_id INTEGER PRIMARY KEY AUTOINCREMENT,
                     account_id INTEGER NOT NULL,
-                    txn_type TEXT NOT NULL,
+                    txn_type INTEGER NOT NULL CHECK (txn_type IN ({TxnType.sql_codes()})),
                     amount REAL NOT NULL,
-                    timestamp TEXT NOT NULL,
+                    timestamp REAL NOT NULL, -- Unix epoch seconds
                     FOREIGN KEY (account_id) REFERENCES accounts (account_id)
                 )
             ''')
@@ -87,13 +440,13 @@ class BankDatabase:
             ''')
             
             # Loans Table
-            self.cursor.execute('''
+            self.cursor.execute(f'''
                 CREATE TABLE IF NOT EXISTS loans (
                     loan_id INTEGER PRIMARY KEY AUTOINCREMENT,
                     customer_id INTEGER NOT NULL,
                     amount REAL NOT NULL,
                     interest_rate REAL NOT NULL,
-                    status TEXT NOT NULL, -- Approved, Pending, Paid
+                    status INTEGER NOT NULL CHECK (status IN ({LoanStatus.sql_codes()})), -- LoanStatus
                     FOREIGN KEY (customer_id) REFERENCES customers (customer_id)
                 )
             ''')
@@ -109,247 +462,770 @@ class BankDatabase:
                     FOREIGN KEY (customer_id) REFERENCES customers (customer_id)
                 )
             ''')
+
+            for table in legacy_tables:
+                self.copy_legacy_rows(table)
+
+            # Foreign-key indexes for per-customer / per-account lookups
+            for table in TABLE_INDEXES:
+                self.create_indexes(table)
             
             self.conn.commit()
-            logging.info(f"Database '{DB_NAME}' and tables initialized successfully.")
+            logging.info(f"Database '{self.db_name}' and tables initialized successfully.")
         except sqlite3.Error as e:
+            self.conn.rollback()
             logging.error(f"Failed to create database tables: {e}")
 
+    def retire_legacy_tables(self) -> List[str]:
+        """
+        Renames tables that still declare a LEGACY_COLUMN_CONVERSIONS column as TEXT to
+        '<table>_legacy', so create_tables builds them with the current schema (coded
+        types and CHECK constraints). Returns the names of the renamed tables.
+        """
+        retired = []
+        for table, conversions in LEGACY_COLUMN_CONVERSIONS.items():
+            declared = {row[1]: row[2].upper() for row in self.cursor.execute(f"PRAGMA table_info({table})")}
+            if any(declared.get(column) == 'TEXT' for column in conversions):
+                # legacy_alter_table keeps other tables' foreign keys on the original name
+                self.cursor.execute("PRAGMA legacy_alter_table = ON")
+                self.cursor.execute(f"ALTER TABLE {table} RENAME TO {table}_legacy")
+                self.cursor.execute("PRAGMA legacy_alter_table = OFF")
+                retired.append(table)
+        return retired
+
+    def copy_legacy_rows(self, table: str):
+        """Copies every row of '<table>_legacy' into the rebuilt table, converting old values, then drops it."""
+        conversions = LEGACY_COLUMN_CONVERSIONS[table]
+        columns = [row[1] for row in self.cursor.execute(f"PRAGMA table_info({table}_legacy)")]
+        values = [conversions.get(column, column) for column in columns]
+        self.cursor.execute(f"INSERT INTO {table} ({', '.join(columns)}) "
+                            f"SELECT {', '.join(values)} FROM {table}_legacy")
+        self.cursor.execute(f"DROP TABLE {table}_legacy")
+        logging.info(f"Migrated table '{table}' to the current schema.")
+
+    def create_indexes(self, table: str):
+        """Creates the secondary indexes declared for table in TABLE_INDEXES."""
+        for name, columns in TABLE_INDEXES.get(table, []):
+            self.cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+
+    def drop_indexes(self, table: str):
+        """Drops the secondary indexes declared for table in TABLE_INDEXES."""
+        for name, _ in TABLE_INDEXES.get(table, []):
+            self.cursor.execute(f"DROP INDEX IF EXISTS {name}")
+
+    @contextmanager
+    def deferred_indexes(self, table: str):
+        """
+        Drops table's secondary indexes for the duration of the block and rebuilds
+        them once at the end, which is cheaper than maintaining them row by row
+        during a large load. Runs inside a transaction, so a failure restores them.
+        """
+        with self.transaction():
+            self.drop_indexes(table)
+            yield self
+            self.create_indexes(table)
+
+    def warm_statement_cache(self):
+        """Prepares every entity's DML statement once so the first real call skips parsing."""
+        # dict.fromkeys dedupes: slots=True dataclasses leave their pre-slots class in __subclasses__()
+        statements = list(dict.fromkeys(sql for cls in BaseEntity.__subclasses__() for sql in cls.prepared_statements()))
+        with self.pool.write_lock:
+            # Warming needs the write lock; if another process holds it, fail fast (the statements
+            # are still compiled) instead of stalling start-up for the whole busy timeout
+            busy_timeout = self.cursor.execute("PRAGMA busy_timeout").fetchone()[0]
+            self.cursor.execute("PRAGMA busy_timeout = 0")
+            self.cursor.execute("BEGIN")
+            try:
+                for sql in statements:
+                    # NULL parameters match no rows or trip a NOT NULL constraint; either way the
+                    # statement is compiled into the cache and the rollback below discards any effect.
+                    try:
+                        self.cursor.execute(sql, (None,) * sql.count('?'))
+                    except sqlite3.Error:
+                        pass
+            finally:
+                self.conn.rollback()
+                self.cursor.execute(f"PRAGMA busy_timeout = {int(busy_timeout)}")
+
+    def owns_transaction(self) -> bool:
+        """True if the calling thread is inside a transaction() block."""
+        return self.in_transaction_scope and self._scope_thread == threading.get_ident()
+
+    def touch(self, table: str):
+        """
+        Invalidates cached rows of a table that was just written. Inside a transaction()
+        block this is deferred until the block commits or rolls back.
+        """
+        if self.owns_transaction():
+            self._dirty_tables.add(table)
+        else:
+            self.record_cache.invalidate(table)
+
+    def mark_scope_failed(self):
+        """Makes the calling thread's open transaction() block roll back instead of commit."""
+        if self.owns_transaction():
+            self._scope_failed = True
+
+    @contextmanager
+    def transaction(self):
+        """
+        Groups several DML statements into one BEGIN IMMEDIATE ... COMMIT block.
+        Nested calls join the outer transaction. Rolls back if the block raises
+        or if any entity DML call inside it failed. Holds the write lock throughout.
+        """
+        if self.owns_transaction():
+            yield self
+            return
+        with self.pool.write_lock:
+            self.cursor.execute("BEGIN IMMEDIATE")
+            self.in_transaction_scope = True
+            self._scope_thread = threading.get_ident()
+            self._scope_failed = False
+            self.scope_timestamp = time.time()
+            try:
+                yield self
+            except BaseException:
+                self.conn.rollback()
+                raise
+            else:
+                if self._scope_failed:
+                    self.conn.rollback()
+                    logging.warning("Transaction rolled back after a failed statement.")
+                else:
+                    self.conn.commit()
+            finally:
+                self.in_transaction_scope = False
+                self._scope_thread = None
+                self._scope_failed = False
+                self.scope_timestamp = None
+                for table in self._dirty_tables:
+                    self.record_cache.invalidate(table)
+                self._dirty_tables.clear()
+
+    @contextmanager
+    def read_connection(self):
+        """
+        Yields a pooled reader for one read. Falls back to the writer (under its lock)
+        inside a transaction, to see uncommitted rows, or when every reader is busy.
+        """
+        if not self.owns_transaction():
+            with self.pool.reader() as conn:
+                if conn is not None:
+                    yield conn
+                    return
+        with self.pool.write_lock:
+            yield self.conn
+
+    def sync_record_cache(self):
+        """
+        Clears the record cache if another connection or process committed since the
+        last check. Own writes are handled by touch(); this catches the rest.
+        """
+        try:
+            with self.read_connection() as conn:
+                self.record_cache.sync(id(conn), conn.execute("PRAGMA data_version").fetchone()[0])
+        except sqlite3.Error as e:
+            logging.warning(f"Could not check for external changes; clearing record cache: {e}")
+            self.record_cache.invalidate_all()
+
+    def fetch_one(self, sql: str, params: tuple) -> Optional[tuple]:
+        """Runs a single-row SELECT on a connection from read_connection()."""
+        with self.read_connection() as conn:
+            return conn.execute(sql, params).fetchone()
+
+    def fetch_all(self, sql: str, params: tuple) -> List[tuple]:
+        """Multi-row counterpart of fetch_one, with the same connection routing."""
+        with self.read_connection() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def _write(self, sql: str, table: str, run):
+        """
+        Shared path of the execute_* helpers: calls run(cursor) under the write lock,
+        commits unless inside a transaction() block and invalidates table's cached
+        rows. On failure logs the error, rolls back (or fails the enclosing
+        transaction() block) and returns None.
+        """
+        with self.pool.write_lock:
+            try:
+                result = run(self.cursor)
+                if not self.in_transaction_scope:
+                    self.conn.commit()
+            except sqlite3.Error as e:
+                logging.error(f"SQL DML Failed (Statement: {sql[:50]}...): {e}")
+                if self.in_transaction_scope:
+                    self.mark_scope_failed()
+                else:
+                    self.conn.rollback()
+                return None
+            self.touch(table)
+            return result
+
+    def execute_insert(self, sql: str, params: tuple, table: str) -> Optional[int]:
+        """Executes one INSERT into table and returns the new row ID, or None on failure."""
+        return self._write(sql, table, lambda cursor: cursor.execute(sql, params).lastrowid)
+
+    def execute_update(self, sql: str, params: tuple, table: str) -> bool:
+        """Executes one UPDATE/DELETE on table; returns success."""
+        return self._write(sql, table, lambda cursor: cursor.execute(sql, params)) is not None
+
+    def execute_returning(self, sql: str, params: tuple, table: str) -> Optional[List[tuple]]:
+        """
+        Executes one DML statement with a RETURNING clause on table; returns the
+        returned rows (empty if no row matched), or None on failure.
+        """
+        # fetchall steps the statement to completion so it is not left open across the commit
+        return self._write(sql, table, lambda cursor: cursor.execute(sql, params).fetchall())
+
+    def execute_many(self, sql: str, rows: List[tuple], table: str) -> Optional[int]:
+        """
+        Executes one DML statement for every parameter tuple in rows, inside a single
+        transaction. Returns the number of rows affected, or None on failure.
+        """
+        with self.transaction():
+            return self._write(sql, table, lambda cursor: cursor.executemany(sql, rows).rowcount)
+
+    def bulk_insert(self, table: str, columns: tuple, rows: List[tuple], chunk: int = BULK_INSERT_CHUNK) -> Optional[int]:
+        """
+        Inserts rows using multi-row 'VALUES (?, ?), (?, ?), ...' statements of
+        `chunk` tuples each, plus one shorter statement for the leftovers, all in
+        a single transaction. Returns the number of rows inserted.
+        """
+        rows = list(rows)
+        if not rows:
+            return 0
+        placeholders = "(" + ", ".join("?" * len(columns)) + ")"
+        prefix = f"INSERT INTO {table} ({', '.join(columns)}) VALUES "
+        full_sql = prefix + ", ".join([placeholders] * chunk)
+        full_rows = len(rows) - len(rows) % chunk
+        scope = self.deferred_indexes(table) if len(rows) >= BULK_INDEX_REBUILD_THRESHOLD else self.transaction()
+        try:
+            with scope:
+                for start in range(0, full_rows, chunk):
+                    params = list(itertools.chain.from_iterable(rows[start:start + chunk]))
+                    self.cursor.execute(full_sql, params)
+                tail = rows[full_rows:]
+                if tail:
+                    tail_sql = prefix + ", ".join([placeholders] * len(tail))
+                    self.cursor.execute(tail_sql, list(itertools.chain.from_iterable(tail)))
+                self.touch(table)
+            return len(rows)
+        except sqlite3.Error as e:
+            logging.error(f"Bulk insert into {table} failed ({len(rows)} rows): {e}")
+            self.mark_scope_failed()
+            return None
+
+    def analytics_conn(self):
+        """
+        Returns a DuckDB connection with this database attached read-only, for
+        scan-heavy reports (DuckDB reads the SQLite file with its vectorized engine).
+        Returns None if duckdb is not installed, the database is in-memory or the
+        connection could not be opened, in which case reports run on the pooled
+        sqlite3 readers instead.
+        """
+        if duckdb is None or self.db_name in (':memory:', '') or self._analytics_failed:
+            return None
+        with self._analytics_lock:
+            try:
+                if self._analytics_conn is None:
+                    conn = duckdb.connect()
+                    try:
+                        conn.execute("INSTALL sqlite; LOAD sqlite;")
+                        path = str(pathlib.Path(self.db_name).resolve()).replace("'", "''")
+                        conn.execute(f"ATTACH '{path}' AS bank (TYPE SQLITE, READ_ONLY)")
+                    except duckdb.Error:
+                        conn.close()
+                        raise
+                    self._analytics_conn = conn
+                # Each caller gets its own cursor (a DuckDB connection is not safe to share across
+                # threads); USE only applies to the connection it runs on, so each cursor needs it
+                cursor = self._analytics_conn.cursor()
+                cursor.execute("USE bank")
+                return cursor
+            except duckdb.Error as e:
+                self._analytics_failed = True
+                logging.error(f"Failed to open DuckDB analytics connection: {e}")
+                return None
+
+    def report_transaction_totals(self) -> List[tuple]:
+        """Returns (account_id, total deposited, total withdrawn, transaction count) for every account."""
+        sql = '''
+            SELECT account_id,
+                   SUM(CASE WHEN txn_type = ? THEN amount ELSE 0 END),
+                   SUM(CASE WHEN txn_type = ? THEN amount ELSE 0 END),
+                   COUNT(*)
+            FROM transactions
+            GROUP BY account_id
+            ORDER BY account_id
+        '''
+        params = (int(TxnType.DEPOSIT), int(TxnType.WITHDRAWAL))
+        conn = self.analytics_conn()
+        if conn is not None:
+            try:
+                return [tuple(row) for row in conn.execute(sql, params).fetchall()]
+            except duckdb.Error as e:
+                logging.warning(f"DuckDB report failed, falling back to SQLite: {e}")
+            finally:
+                conn.close()
+        try:
+            return self.fetch_all(sql, params)
+        except sqlite3.Error as e:
+            logging.error(f"Transaction totals report failed: {e}")
+            return []
+
     def close(self):
-        """Closes the database connection."""
-        self.conn.close()
-        logging.info("Database connection closed.")
+        """Flushes queued transaction rows and closes the database connection."""
+        try:
+            if Account.flush_queued_transactions(self) is None:
+                # The connection is about to close, so these rows will not be written by a later flush
+                logging.error(f"Closing with {len(self.pending_transactions)} unwritten transaction rows "
+                              f"(account_id, txn_type, amount, timestamp): {self.pending_transactions}")
+        finally:
+            if self._analytics_conn is not None:
+                self._analytics_conn.close()
+            self.pool.close()
+            logging.info("Database connection closed.")
 
 # --- 2. Core Entities (OOP Model) ---
 
+@dataclass(slots=True, eq=False)
 class BaseEntity:
     """
     Base class providing common methods for database interaction (CRUD).
     Implements core exception handling for SQL operations.
+    Entities are slotted dataclasses: fields are plain public attributes with no
+    per-instance __dict__, and equality stays identity-based (eq=False).
     """
-    def __init__(self, db: BankDatabase):
-        self._db = db
+    _db: BankDatabase = field(repr=False)
+    # Table written by the subclass's DML; its cached rows are invalidated on every write
+    _table: ClassVar[str] = ''
+    # Columns in field order; loads select exactly these and pass them by name
+    _columns: ClassVar[tuple] = ()
+    # (id, name) columns used by display paths that do not need the full record
+    _minimal_columns: ClassVar[tuple] = ()
+    # Columns written by save_new/bulk_save, in _pack() order
+    _insert_columns: ClassVar[tuple] = ()
 
-    def _fetch_record(self, table: str, id_field: str, id_value: int) -> Optional[tuple]:
-        """Generic method to fetch a single record by ID."""
-        sql = f"SELECT * FROM {table} WHERE {id_field} = ?"
+    def __init_subclass__(cls, **kwargs):
+        """
+        Specializes the subclass at creation: registers its lookup statements in
+        _FETCH_SQL and generates _SQL_INSERT, _pack() and _from_row() from
+        _table, _columns and _insert_columns.
+        """
+        # Explicit form: zero-argument super() does not work in slots=True dataclasses
+        super(BaseEntity, cls).__init_subclass__(**kwargs)
+        if not cls._table or not cls._columns:
+            return
+        id_field = cls._columns[0]
+        for columns in (cls._columns, cls._minimal_columns):
+            if columns:
+                _FETCH_SQL[(cls._table, id_field, columns)] = (
+                    f"SELECT {', '.join(columns)} FROM {cls._table} WHERE {id_field} = ?")
+        if cls._insert_columns:
+            cls._SQL_INSERT = (f"INSERT INTO {cls._table} ({', '.join(cls._insert_columns)}) "
+                               f"VALUES ({', '.join('?' * len(cls._insert_columns))})")
+        # Straight-line attribute reads, compiled once, instead of a getattr/zip loop per row
+        source = (
+            "def _pack(self):\n"
+            f"    return ({''.join(f'self.{c}, ' for c in cls._insert_columns)})\n"
+            "def _from_row(cls, db, row):\n"
+            f"    return cls(db, {', '.join(f'{c}=row[{i}]' for i, c in enumerate(cls._columns))})\n"
+        )
+        namespace: Dict[str, Any] = {}
+        exec(source, {}, namespace)
+        cls._pack = namespace['_pack']
+        cls._from_row = classmethod(namespace['_from_row'])
+
+    @classmethod
+    def prepared_statements(cls) -> List[str]:
+        """Returns the class's _SQL_* statement constants."""
+        return [value for name, value in vars(cls).items() if name.startswith('_SQL_')]
+
+    def _fetch_record(self, table: str, id_field: str, id_value: int, columns: tuple) -> Optional[tuple]:
+        """Generic method to fetch a single record by ID, selecting a registered column set."""
+        sql = _FETCH_SQL[(table, id_field, columns)]
+        # Inside a transaction the writer may see uncommitted rows, which must not be cached
+        cache = None if self._db.owns_transaction() else self._db.record_cache
+        key = (sql, id_value)
+        if cache is not None:
+            self._db.sync_record_cache()
+            record = cache.get(table, key)
+            if record is not RecordCache.MISS:
+                return record
+            generation = cache.generation(table)
         try:
-            self._db.cursor.execute(sql, (id_value,))
-            return self._db.cursor.fetchone()
+            record = self._db.fetch_one(sql, (id_value,))
         except sqlite3.Error as e:
             logging.error(f"SQL Fetch Failed for {table} ID {id_value}: {e}")
             return None
+        # Misses are not cached: another process (e.g. an ingest) may insert the row at any time
+        if cache is not None and record is not None:
+            cache.put(table, key, record, generation)
+        return record
 
-    def _execute_dml(self, sql: str, params: tuple) -> Optional[int]:
-        """Generic method to execute DML (Insert/Update) queries with error handling."""
-        try:
-            self._db.cursor.execute(sql, params)
-            self._db.conn.commit()
-            # Return the last inserted row ID for INSERT operations
-            if sql.strip().upper().startswith("INSERT"):
-                return self._db.cursor.lastrowid
-            return 1 # Success indicator for UPDATE/DELETE
-        except sqlite3.Error as e:
-            logging.error(f"SQL DML Failed (Statement: {sql[:50]}...): {e}")
-            return None
+    def _fetch_minimal(self, id_value: int) -> Optional[tuple]:
+        """Fetches only the entity's _minimal_columns for the row with the given ID."""
+        return self._fetch_record(self._table, self._columns[0], id_value, self._minimal_columns)
+
+    def _execute_insert(self, sql: str, params: tuple, table: Optional[str] = None) -> Optional[int]:
+        """
+        Executes an INSERT and returns the new row ID (None on failure). table names
+        the table written when it is not the entity's own.
+        """
+        return self._db.execute_insert(sql, params, table or self._table)
 
+    def _execute_update(self, sql: str, params: tuple) -> bool:
+        """Executes an UPDATE/DELETE on the entity's table; returns success."""
+        return self._db.execute_update(sql, params, self._table)
+
+    def _execute_returning(self, sql: str, params: tuple) -> Optional[List[tuple]]:
+        """
+        Executes a DML statement with a RETURNING clause on the entity's table; returns
+        the returned rows (empty if no row matched), or None on failure.
+        """
+        return self._db.execute_returning(sql, params, self._table)
+
+    def _execute_many(self, sql: str, rows: List[tuple], table: Optional[str] = None) -> Optional[int]:
+        """
+        Executes one DML statement for every parameter tuple in rows, inside a single
+        transaction. table names the table written when it is not the entity's own.
+        """
+        return self._db.execute_many(sql, rows, table or self._table)
+
+@dataclass(slots=True, eq=False)
 class Customer(BaseEntity):
     """Represents a bank customer."""
-    def __init__(self, db: BankDatabase, customer_id: Optional[int] = None, first_name: str = '', last_name: str = '', address: str = '', join_date: Optional[str] = None):
-        super().__init__(db)
-        self._customer_id = customer_id
-        self._first_name = first_name
-        self._last_name = last_name
-        self._address = address
-        self._join_date = join_date if join_date else datetime.date.today().isoformat()
-        
-    # --- Getters ---
-    @property
-    def customer_id(self) -> Optional[int]: return self._customer_id
-    @property
-    def full_name(self) -> str: return f"{self._first_name} {self._last_name}"
+    _table = 'customers'
+    _columns = ('customer_id', 'first_name', 'last_name', 'address', 'join_date')
+    # full_name is the generated column, so display paths read the name without building it
+    _minimal_columns = ('customer_id', 'full_name')
+    _insert_columns = ('first_name', 'last_name', 'address', 'join_date')
+    _SQL_UPDATE_ADDRESS = "UPDATE customers SET address = ? WHERE customer_id = ?"
+    _SQL_EXISTS = "SELECT 1 FROM customers WHERE customer_id = ? LIMIT 1"
+    # Prefix LIKE on the NOCASE-indexed generated column is answered from idx_customers_fullname
+    _SQL_SEARCH_NAME = ("SELECT customer_id, full_name FROM customers "
+                        "WHERE full_name LIKE ? ESCAPE '\\' ORDER BY full_name COLLATE NOCASE LIMIT ?")
+
+    customer_id: Optional[int] = None
+    first_name: str = ''
+    last_name: str = ''
+    address: str = ''
+    join_date: Optional[str] = None
+
+    def __post_init__(self):
+        if not self.join_date:
+            self.join_date = datetime.date.today().isoformat()
+
     @property
-    def address(self) -> str: return self._address
-    
-    # --- Setters (Example for Address with DB update) ---
-    @address.setter
-    def address(self, new_address: str):
-        self._address = new_address
-        if self._customer_id:
-            sql = "UPDATE customers SET address = ? WHERE customer_id = ?"
-            if self._execute_dml(sql, (new_address, self._customer_id)):
-                logging.info(f"Customer {self._customer_id} address updated.")
+    def full_name(self) -> str:
+        """Same expression as the customers.full_name generated column."""
+        return f"{self.first_name} {self.last_name}"
+
+    def update_address(self, new_address: str):
+        """Changes the address and writes it to the DB if the customer is saved."""
+        self.address = new_address
+        if self.customer_id:
+            if self._execute_update(self._SQL_UPDATE_ADDRESS, (new_address, self.customer_id)):
+                logging.info(f"Customer {self.customer_id} address updated.")
 
     def save_new(self) -> Optional[int]:
         """Inserts a new customer record into the database."""
-        sql = "INSERT INTO customers (first_name, last_name, address, join_date) VALUES (?, ?, ?, ?)"
-        params = (self._first_name, self._last_name, self._address, self._join_date)
-        new_id = self._execute_dml(sql, params)
+        new_id = self._execute_insert(self._SQL_INSERT, self._pack())
         if new_id:
-            self._customer_id = new_id
-            logging.info(f"Customer {self.full_name} saved with ID {new_id}")
+            self.customer_id = new_id
+            if logging.root.isEnabledFor(logging.DEBUG):
+                logging.debug(f"Customer {self.full_name} saved with ID {new_id}")
         return new_id
     
     @classmethod
     def load(cls, db: BankDatabase, customer_id: int) -> Optional['Customer']:
         """Loads a customer from the database by ID."""
-        record = cls(db)._fetch_record('customers', 'customer_id', customer_id)
+        record = cls(db)._fetch_record(cls._table, 'customer_id', customer_id, cls._columns)
         if record:
-            # record: (id, first_name, last_name, address, join_date)
-            return cls(db, *record)
+            return cls._from_row(db, record)
         logging.warning(f"Customer with ID {customer_id} not found.")
         return None
 
+    @classmethod
+    def display_name(cls, db: BankDatabase, customer_id: int) -> Optional[str]:
+        """Returns the customer's full name without loading the rest of the record."""
+        record = cls(db)._fetch_minimal(customer_id)
+        return record[1] if record else None
+
+    @classmethod
+    def search_by_name(cls, db: BankDatabase, prefix: str, limit: int = 20) -> List[tuple]:
+        """Returns up to limit (customer_id, full_name) rows whose full name starts with prefix, case-insensitively."""
+        pattern = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        try:
+            return db.fetch_all(cls._SQL_SEARCH_NAME, (pattern, limit))
+        except sqlite3.Error as e:
+            logging.error(f"Customer name search failed: {e}")
+            return []
+
+    @classmethod
+    def exists(cls, db: BankDatabase, customer_id: int) -> bool:
+        """Checks that a customer ID exists without loading the record."""
+        try:
+            return db.fetch_one(cls._SQL_EXISTS, (customer_id,)) is not None
+        except sqlite3.Error as e:
+            logging.error(f"SQL Fetch Failed for customers ID {customer_id}: {e}")
+            return False
+
+    @classmethod
+    def bulk_save(cls, db: BankDatabase, customers: List['Customer']) -> Optional[int]:
+        """Inserts many new customers with multi-row INSERTs. IDs are not assigned back."""
+        count = db.bulk_insert(cls._table, cls._insert_columns, [c._pack() for c in customers])
+        if count:
+            logging.info(f"{count} customers saved in bulk.")
+        return count
+
+@dataclass(slots=True, eq=False)
 class Account(BaseEntity):
     """Represents a bank account (Checking or Savings)."""
-    def __init__(self, db: BankDatabase, account_id: Optional[int] = None, customer_id: Optional[int] = None, balance: float = 0.0, account_type: str = 'Checking', is_active: int = 1):
-        super().__init__(db)
-        self._account_id = account_id
-        self._customer_id = customer_id
-        self._balance = balance
-        self._account_type = account_type
-        self._is_active = is_active
-        
-    # --- Getters ---
-    @property
-    def account_id(self) -> Optional[int]: return self._account_id
-    @property
-    def balance(self) -> float: return self._balance
-    @property
-    def account_type(self) -> str: return self._account_type
+    _table = 'accounts'
+    _columns = ('account_id', 'customer_id', 'balance', 'account_type', 'is_active')
+    _minimal_columns = ('account_id', 'account_type')
+    _insert_columns = ('customer_id', 'balance', 'account_type')
+    _SQL_DEPOSIT = "UPDATE accounts SET balance = balance + ? WHERE account_id = ? RETURNING balance"
+    # The balance >= ? guard makes the funds check atomic against the stored balance
+    _SQL_WITHDRAW = "UPDATE accounts SET balance = balance - ? WHERE account_id = ? AND balance >= ? RETURNING balance"
+    _SQL_RECORD_TXN = "INSERT INTO transactions (account_id, txn_type, amount, timestamp) VALUES (?, ?, ?, ?)"
+    _SQL_RECENT_TXNS = ("SELECT txn_type, amount, timestamp FROM transactions "
+                        "WHERE account_id = ? ORDER BY timestamp DESC LIMIT ?")
+
+    account_id: Optional[int] = None
+    customer_id: Optional[int] = None
+    balance: float = 0.0
+    account_type: AccountType = AccountType.CHECKING
+    is_active: int = 1
+
+    def __post_init__(self):
+        self.account_type = AccountType.coerce(self.account_type)
+
+    def __repr__(self) -> str:
+        return f"Account(id={self.account_id}, type={self.account_type.label}, balance={self.balance:.2f})"
         
-    def _record_transaction(self, txn_type: str, amount: float):
-        """Records a transaction in the transactions table."""
-        timestamp = datetime.datetime.now().isoformat()
-        sql = "INSERT INTO transactions (account_id, txn_type, amount, timestamp) VALUES (?, ?, ?, ?)"
-        self._execute_dml(sql, (self._account_id, txn_type, amount, timestamp))
+    @staticmethod
+    def format_timestamp(timestamp) -> str:
+        """Renders a stored epoch timestamp as ISO text (rows written before the REAL column pass through)."""
+        try:
+            return datetime.datetime.fromtimestamp(float(timestamp)).isoformat()
+        except (TypeError, ValueError):
+            return str(timestamp)
+
+    def _record_transaction(self, txn_type: TxnType, amount: float, timestamp: Optional[float] = None) -> Optional[int]:
+        """
+        Records a transaction in the transactions table. Inside a transaction() block
+        the block's start time is reused instead of reading the clock per row.
+        """
+        if timestamp is None:
+            timestamp = self._db.scope_timestamp if self._db.owns_transaction() else time.time()
+        return self._execute_insert(self._SQL_RECORD_TXN, (self.account_id, txn_type, amount, timestamp), 'transactions')
+
+    @classmethod
+    def record_transactions_bulk(cls, db: BankDatabase, rows: List[tuple]) -> Optional[int]:
+        """Inserts (account_id, txn_type, amount, epoch timestamp) rows with one executemany and one commit."""
+        if not rows:
+            return 0
+        return cls(db)._execute_many(cls._SQL_RECORD_TXN, rows, table='transactions')
+
+    @classmethod
+    def queue_transaction(cls, db: BankDatabase, account_id: int, txn_type: TxnType, amount: float):
+        """Queues a transaction row; the queue is flushed every TXN_FLUSH_THRESHOLD rows and on close."""
+        db.pending_transactions.append((account_id, TxnType.coerce(txn_type), amount, time.time()))
+        if len(db.pending_transactions) >= TXN_FLUSH_THRESHOLD:
+            cls.flush_queued_transactions(db)
+
+    @classmethod
+    def flush_queued_transactions(cls, db: BankDatabase) -> Optional[int]:
+        """
+        Writes all queued transaction rows in a single batch. If the batch fails the
+        rows are put back at the front of the queue, so no ledger row is dropped.
+        """
+        rows, db.pending_transactions = db.pending_transactions, []
+        try:
+            count = cls.record_transactions_bulk(db, rows)
+        except sqlite3.Error as e:
+            # BEGIN IMMEDIATE fails when another process holds the write lock
+            logging.error(f"Flushing queued transactions failed: {e}")
+            count = None
+        if count is None:
+            db.pending_transactions[:0] = rows
+            logging.error(f"{len(rows)} queued transaction rows kept for the next flush.")
+        return count
+
+    def recent_transactions(self, limit: int = 10) -> List[tuple]:
+        """Returns the latest (txn type label, amount, ISO timestamp) rows for this account, newest first."""
+        try:
+            rows = self._db.fetch_all(self._SQL_RECENT_TXNS, (self.account_id, limit))
+        except sqlite3.Error as e:
+            logging.error(f"SQL Fetch Failed for transactions of Account {self.account_id}: {e}")
+            return []
+        return [(TxnType.coerce(txn_type).label, amount, self.format_timestamp(ts)) for txn_type, amount, ts in rows]
 
     def deposit(self, amount: float) -> bool:
         """Adds funds to the account balance."""
         if amount <= 0: 
-            logging.warning(f"Deposit failed for Account {self._account_id}: Amount must be positive.")
+            logging.warning(f"Deposit failed for Account {self.account_id}: Amount must be positive.")
             return False
         
-        sql = "UPDATE accounts SET balance = balance + ? WHERE account_id = ?"
-        if self._execute_dml(sql, (amount, self._account_id)):
-            self._balance += amount
-            self._record_transaction('Deposit', amount)
-            logging.info(f"Account {self._account_id}: Deposited ${amount:.2f}. New balance: ${self._balance:.2f}")
+        # Balance update and ledger row share one commit (one fsync); RETURNING hands back
+        # the stored balance, so no follow-up SELECT is needed
+        try:
+            with self._db.transaction():
+                rows = self._execute_returning(self._SQL_DEPOSIT, (amount, self.account_id))
+                ok = bool(rows) and self._record_transaction(TxnType.DEPOSIT, amount)
+        except sqlite3.Error as e:
+            # BEGIN IMMEDIATE fails when another process holds the write lock (e.g. an ingest)
+            logging.error(f"Deposit failed for Account {self.account_id}: {e}")
+            return False
+        if ok:
+            self.balance = float(rows[0][0])
+            if logging.root.isEnabledFor(logging.DEBUG):
+                logging.debug(f"Account {self.account_id}: Deposited ${amount:.2f}. New balance: ${self.balance:.2f}")
             return True
+        if rows == []:
+            logging.warning(f"Deposit failed: Account {self.account_id} not found.")
         return False
 
     def withdraw(self, amount: float) -> bool:
         """Removes funds from the account balance."""
         if amount <= 0: 
-            logging.warning(f"Withdrawal failed for Account {self._account_id}: Amount must be positive.")
+            logging.warning(f"Withdrawal failed for Account {self.account_id}: Amount must be positive.")
             return False
-        if amount > self._balance:
-            logging.warning(f"Withdrawal failed for Account {self._account_id}: Insufficient funds (Needed: ${amount:.2f}, Has: ${self._balance:.2f})")
+        if amount > self.balance:
+            logging.warning(f"Withdrawal failed for Account {self.account_id}: Insufficient funds (Needed: ${amount:.2f}, Has: ${self.balance:.2f})")
             return False
             
-        sql = "UPDATE accounts SET balance = balance - ? WHERE account_id = ?"
-        if self._execute_dml(sql, (amount, self._account_id)):
-            self._balance -= amount
-            self._record_transaction('Withdrawal', amount)
-            logging.info(f"Account {self._account_id}: Withdrew ${amount:.2f}. New balance: ${self._balance:.2f}")
+        # Balance update and ledger row share one commit (one fsync)
+        try:
+            with self._db.transaction():
+                rows = self._execute_returning(self._SQL_WITHDRAW, (amount, self.account_id, amount))
+                ok = bool(rows) and self._record_transaction(TxnType.WITHDRAWAL, amount)
+                # The guarded UPDATE matches no row both for a missing account and for short funds
+                missing = rows == [] and self._fetch_minimal(self.account_id) is None
+        except sqlite3.Error as e:
+            logging.error(f"Withdrawal failed for Account {self.account_id}: {e}")
+            return False
+        if ok:
+            self.balance = float(rows[0][0])
+            if logging.root.isEnabledFor(logging.DEBUG):
+                logging.debug(f"Account {self.account_id}: Withdrew ${amount:.2f}. New balance: ${self.balance:.2f}")
             return True
+        if missing:
+            logging.warning(f"Withdrawal failed: Account {self.account_id} not found.")
+        elif rows == []:
+            logging.warning(f"Withdrawal failed for Account {self.account_id}: Insufficient funds in stored balance.")
         return False
 
     def save_new(self) -> Optional[int]:
         """Inserts a new account record into the database."""
-        sql = "INSERT INTO accounts (customer_id, balance, account_type) VALUES (?, ?, ?)"
-        params = (self._customer_id, self._balance, self._account_type)
-        new_id = self._execute_dml(sql, params)
+        new_id = self._execute_insert(self._SQL_INSERT, self._pack())
         if new_id:
-            self._account_id = new_id
-            logging.info(f"New {self._account_type} account opened with ID {new_id} for Customer {self._customer_id}")
+            self.account_id = new_id
+            if logging.root.isEnabledFor(logging.DEBUG):
+                logging.debug(f"New {self.account_type.label} account opened with ID {new_id} for Customer {self.customer_id}")
         return new_id
     
     @classmethod
     def load(cls, db: BankDatabase, account_id: int) -> Optional['Account']:
         """Loads an account from the database by ID."""
-        record = cls(db)._fetch_record('accounts', 'account_id', account_id)
+        record = cls(db)._fetch_record(cls._table, 'account_id', account_id, cls._columns)
         if record:
-            # record: (id, customer_id, balance, account_type, is_active)
-            return cls(db, *record)
+            return cls._from_row(db, record)
         logging.warning(f"Account with ID {account_id} not found.")
         return None
 
+    @classmethod
+    def bulk_save(cls, db: BankDatabase, accounts: List['Account']) -> Optional[int]:
+        """Opens many new accounts with multi-row INSERTs. IDs are not assigned back."""
+        count = db.bulk_insert(cls._table, cls._insert_columns, [a._pack() for a in accounts])
+        if count:
+            logging.info(f"{count} accounts opened in bulk.")
+        return count
+
+@dataclass(slots=True, eq=False)
 class Employee(BaseEntity):
     """Represents a bank employee."""
-    def __init__(self, db: BankDatabase, employee_id: Optional[int] = None, first_name: str = '', last_name: str = '', position: str = '', salary: float = 0.0):
-        super().__init__(db)
-        self._employee_id = employee_id
-        self._first_name = first_name
-        self._last_name = last_name
-        self._position = position
-        self._salary = salary
+    _table = 'employees'
+    _columns = ('employee_id', 'first_name', 'last_name', 'position', 'salary')
+    _minimal_columns = ('employee_id', 'first_name', 'last_name')
+    _insert_columns = ('first_name', 'last_name', 'position', 'salary')
+
+    employee_id: Optional[int] = None
+    first_name: str = ''
+    last_name: str = ''
+    position: str = ''
+    salary: float = 0.0
 
     @property
-    def employee_id(self) -> Optional[int]: return self._employee_id
-    @property
-    def full_name(self) -> str: return f"{self._first_name} {self._last_name}"
-    
+    def full_name(self) -> str: return f"{self.first_name} {self.last_name}"
+
     def save_new(self) -> Optional[int]:
         """Inserts a new employee record into the database."""
-        sql = "INSERT INTO employees (first_name, last_name, position, salary) VALUES (?, ?, ?, ?)"
-        params = (self._first_name, self._last_name, self._position, self._salary)
-        new_id = self._execute_dml(sql, params)
+        new_id = self._execute_insert(self._SQL_INSERT, self._pack())
         if new_id:
-            self._employee_id = new_id
-            logging.info(f"Employee {self.full_name} onboarded with ID {new_id}")
+            self.employee_id = new_id
+            if logging.root.isEnabledFor(logging.DEBUG):
+                logging.debug(f"Employee {self.full_name} onboarded with ID {new_id}")
         return new_id
 
+@dataclass(slots=True, eq=False)
 class Loan(BaseEntity):
     """Represents a loan service offered to a customer."""
-    def __init__(self, db: BankDatabase, loan_id: Optional[int] = None, customer_id: Optional[int] = None, amount: float = 0.0, interest_rate: float = 0.05, status: str = 'Pending'):
-        super().__init__(db)
-        self._loan_id = loan_id
-        self._customer_id = customer_id
-        self._amount = amount
-        self._interest_rate = interest_rate
-        self._status = status
-        
-    @property
-    def loan_id(self) -> Optional[int]: return self._loan_id
-    @property
-    def status(self) -> str: return self._status
+    _table = 'loans'
+    _columns = ('loan_id', 'customer_id', 'amount', 'interest_rate', 'status')
+    _minimal_columns = ('loan_id', 'status')
+    _insert_columns = ('customer_id', 'amount', 'interest_rate', 'status')
+    _SQL_UPDATE_STATUS = "UPDATE loans SET status = ? WHERE loan_id = ?"
+
+    loan_id: Optional[int] = None
+    customer_id: Optional[int] = None
+    amount: float = 0.0
+    interest_rate: float = 0.05
+    status: LoanStatus = LoanStatus.PENDING
+
+    def __post_init__(self):
+        self.status = LoanStatus.coerce(self.status)
+
+    def __repr__(self) -> str:
+        return f"Loan(id={self.loan_id}, amount={self.amount:.2f}, status={self.status.label})"
 
     def approve(self) -> bool:
         """Approves the loan and updates the status in the DB."""
-        if self._status == 'Pending' and self._loan_id:
-            self._status = 'Approved'
-            sql = "UPDATE loans SET status = ? WHERE loan_id = ?"
-            if self._execute_dml(sql, (self._status, self._loan_id)):
-                logging.info(f"Loan {self._loan_id} approved for Customer {self._customer_id}.")
+        if self.status == LoanStatus.PENDING and self.loan_id:
+            self.status = LoanStatus.APPROVED
+            if self._execute_update(self._SQL_UPDATE_STATUS, (self.status, self.loan_id)):
+                logging.info(f"Loan {self.loan_id} approved for Customer {self.customer_id}.")
                 return True
-        logging.warning(f"Loan {self._loan_id} could not be approved (Status: {self._status}).")
+        logging.warning(f"Loan {self.loan_id} could not be approved (Status: {self.status.label}).")
         return False
         
     def save_new(self) -> Optional[int]:
         """Submits a new loan application (Pending status)."""
-        sql = "INSERT INTO loans (customer_id, amount, interest_rate, status) VALUES (?, ?, ?, ?)"
-        params = (self._customer_id, self._amount, self._interest_rate, self._status)
-        new_id = self._execute_dml(sql, params)
+        new_id = self._execute_insert(self._SQL_INSERT, self._pack())
         if new_id:
-            self._loan_id = new_id
-            logging.info(f"Loan application for ${self._amount:.2f} submitted (ID {new_id})")
+            self.loan_id = new_id
+            if logging.root.isEnabledFor(logging.DEBUG):
+                logging.debug(f"Loan application for ${self.amount:.2f} submitted (ID {new_id})")
         return new_id
 
+@dataclass(slots=True, eq=False)
 class CreditCard(BaseEntity):
     """Represents a credit card service."""
-    def __init__(self, db: BankDatabase, card_id: Optional[int] = None, customer_id: Optional[int] = None, credit_limit: float = 1000.0, current_debt: float = 0.0, is_active: int = 1):
-        super().__init__(db)
-        self._card_id = card_id
-        self._customer_id = customer_id
-        self._credit_limit = credit_limit
-        self._current_debt = current_debt
-        self._is_active = is_active
-        
-    @property
-    def credit_limit(self) -> float: return self._credit_limit
+    _table = 'credit_cards'
+    _columns = ('card_id', 'customer_id', 'credit_limit', 'current_debt', 'is_active')
+    _minimal_columns = ('card_id', 'customer_id')
+    _insert_columns = ('customer_id', 'credit_limit', 'current_debt')
+    _SQL_UPDATE_DEBT = "UPDATE credit_cards SET current_debt = ? WHERE card_id = ?"
+
+    card_id: Optional[int] = None
+    customer_id: Optional[int] = None
+    credit_limit: float = 1000.0
+    current_debt: float = 0.0
+    is_active: int = 1
+
     @property
-    def available_credit(self) -> float: return self._credit_limit - self._current_debt
+    def available_credit(self) -> float: return self.credit_limit - self.current_debt
     
     def make_purchase(self, amount: float) -> bool:
         """Simulates a purchase, increasing current debt."""
@@ -358,24 +1234,22 @@ class CreditCard(BaseEntity):
             return False
             
         if amount > self.available_credit:
-            logging.warning(f"Purchase failed for Card {self._card_id}: Exceeds available credit (Limit: ${self.available_credit:.2f})")
+            logging.warning(f"Purchase failed for Card {self.card_id}: Exceeds available credit (Limit: ${self.available_credit:.2f})")
             return False
         
-        self._current_debt += amount
-        sql = "UPDATE credit_cards SET current_debt = ? WHERE card_id = ?"
-        if self._execute_dml(sql, (self._current_debt, self._card_id)):
-            logging.info(f"Card {self._card_id}: Purchase of ${amount:.2f} successful. New debt: ${self._current_debt:.2f}")
+        self.current_debt += amount
+        if self._execute_update(self._SQL_UPDATE_DEBT, (self.current_debt, self.card_id)):
+            logging.info(f"Card {self.card_id}: Purchase of ${amount:.2f} successful. New debt: ${self.current_debt:.2f}")
             return True
         return False
 
     def save_new(self) -> Optional[int]:
         """Inserts a new credit card record into the database."""
-        sql = "INSERT INTO credit_cards (customer_id, credit_limit, current_debt) VALUES (?, ?, ?)"
-        params = (self._customer_id, self._credit_limit, self._current_debt)
-        new_id = self._execute_dml(sql, params)
+        new_id = self._execute_insert(self._SQL_INSERT, self._pack())
         if new_id:
-            self._card_id = new_id
-            logging.info(f"Credit Card (Limit ${self._credit_limit:.2f}) issued with ID {new_id} for Customer {self._customer_id}")
+            self.card_id = new_id
+            if logging.root.isEnabledFor(logging.DEBUG):
+                logging.debug(f"Credit Card (Limit ${self.credit_limit:.2f}) issued with ID {new_id} for Customer {self.customer_id}")
         return new_id
 
 
@@ -387,6 +1261,75 @@ class BankSystem:
         """Initializes the database connection."""
         self.db = BankDatabase(db_name)
 
+    # --- Batch Ingest (non-interactive) ---
+    def ingest(self, entity: str, stream, chunk_size: int = INGEST_CHUNK_SIZE) -> Optional[int]:
+        """
+        Bulk-loads 'customers' or 'accounts' from a JSONL stream. The whole load is
+        one transaction; records are handed to bulk_save chunk_size at a time. Once
+        the load reaches BULK_INDEX_REBUILD_THRESHOLD records the table's indexes are
+        dropped and rebuilt once at the end. Invalid lines are skipped.
+        Returns the number of records saved, or None if the load was rolled back.
+        """
+        model, parse = {
+            'customers': (Customer, self._customer_from_json),
+            'accounts': (Account, self._account_from_json),
+        }[entity]
+        saved = skipped = 0
+        failed = deferred = False
+        chunk = []
+        with self.db.transaction():
+            for line_no, line in enumerate(stream, 1):
+                if not line.strip():
+                    continue
+                try:
+                    chunk.append(parse(json.loads(line)))
+                except (ValueError, KeyError, TypeError) as e:
+                    skipped += 1
+                    logging.warning(f"Skipping {entity} record on line {line_no}: {e}")
+                    continue
+                if len(chunk) >= chunk_size:
+                    if not deferred and saved + len(chunk) >= BULK_INDEX_REBUILD_THRESHOLD:
+                        self.db.drop_indexes(entity)
+                        deferred = True
+                    count = model.bulk_save(self.db, chunk)
+                    if count is None:
+                        failed = True
+                        break
+                    saved += count
+                    chunk = []
+            if chunk and not failed:
+                count = model.bulk_save(self.db, chunk)
+                failed = count is None
+                saved += count or 0
+            if deferred and not failed:
+                self.db.create_indexes(entity)
+        if failed:
+            logging.error(f"Ingest of {entity} rolled back; no records were saved.")
+            return None
+        logging.info(f"Ingest complete: {saved} {entity} saved, {skipped} skipped.")
+        return saved
+
+    def _customer_from_json(self, record: Dict[str, Any]) -> Customer:
+        """Builds an unsaved Customer from one JSONL record."""
+        first_name = str(record['first_name']).strip()
+        last_name = str(record['last_name']).strip()
+        if not first_name or not last_name:
+            raise ValueError("first and last names are required")
+        return Customer(self.db, first_name=first_name, last_name=last_name,
+                        address=str(record.get('address', '')).strip(), join_date=record.get('join_date'))
+
+    def _account_from_json(self, record: Dict[str, Any]) -> Account:
+        """Builds an unsaved Account from one JSONL record."""
+        customer_id = int(record['customer_id'])
+        account_type = AccountType.coerce(str(record.get('account_type', 'Checking')))
+        balance = float(record.get('balance', 0.0))
+        # float() accepts 'nan' and 'inf'; NaN would bind as NULL and abort the whole load
+        if not math.isfinite(balance) or balance < 0:
+            raise ValueError(f"invalid balance {record.get('balance')!r}")
+        if not Customer.exists(self.db, customer_id):
+            raise ValueError(f"customer ID {customer_id} not found")
+        return Account(self.db, customer_id=customer_id, balance=balance, account_type=account_type)
+
     # --- Customer Menu Functions ---
     def create_customer(self):
         """Prompts for customer details and saves a new Customer record."""
@@ -400,7 +1343,8 @@ class BankSystem:
             return
 
         customer = Customer(self.db, first_name=first_name, last_name=last_name, address=address)
-        customer.save_new()
+        if customer.save_new():
+            print(f"Customer {customer.full_name} saved with ID {customer.customer_id}.")
 
     def view_customer(self):
         """Prompts for customer ID and displays customer details."""
@@ -425,19 +1369,21 @@ class BankSystem:
         print("\n--- OPEN NEW ACCOUNT ---")
         try:
             customer_id = int(input("Enter Customer ID for the new account: "))
-            if not Customer.load(self.db, customer_id):
+            if not Customer.exists(self.db, customer_id):
                 logging.warning(f"Cannot open account: Customer ID {customer_id} not found.")
                 return
 
             account_type = input("Enter account type (Checking/Savings): ").strip().capitalize()
             initial_deposit = float(input("Enter initial deposit amount: "))
 
-            if account_type not in ['Checking', 'Savings']:
+            if account_type not in [t.label for t in AccountType]:
                 logging.warning("Invalid account type. Must be 'Checking' or 'Savings'.")
                 return
 
-            account = Account(self.db, customer_id=customer_id, balance=initial_deposit, account_type=account_type)
-            account.save_new()
+            account = Account(self.db, customer_id=customer_id, balance=initial_deposit,
+                              account_type=AccountType.coerce(account_type))
+            if account.save_new():
+                print(f"{account_type} account opened with ID {account.account_id}.")
         except ValueError:
             logging.error("Invalid input. Please ensure ID and deposit amount are numbers.")
         except Exception as e:
@@ -458,9 +1404,11 @@ class BankSystem:
             amount = float(input("Enter transaction amount: "))
 
             if action == 'D':
-                account.deposit(amount)
+                if account.deposit(amount):
+                    print(f"Deposited ${amount:.2f}. New balance: ${account.balance:.2f}")
             elif action == 'W':
-                account.withdraw(amount)
+                if account.withdraw(amount):
+                    print(f"Withdrew ${amount:.2f}. New balance: ${account.balance:.2f}")
             else:
                 logging.warning("Invalid transaction type. Use 'D' for Deposit or 'W' for Withdrawal.")
 
@@ -479,7 +1427,8 @@ class BankSystem:
         try:
             salary = float(input("Enter salary: "))
             emp = Employee(self.db, first_name=first_name, last_name=last_name, position=position, salary=salary)
-            emp.save_new()
+            if emp.save_new():
+                print(f"Employee {emp.full_name} onboarded with ID {emp.employee_id}.")
         except ValueError:
             logging.error("Invalid input for salary. Please enter a number.")
         except Exception as e:
@@ -491,7 +1440,7 @@ class BankSystem:
         print("\n--- LOAN APPLICATION ---")
         try:
             customer_id = int(input("Enter Customer ID applying for loan: "))
-            if not Customer.load(self.db, customer_id):
+            if not Customer.exists(self.db, customer_id):
                 logging.warning("Loan application failed: Customer ID not found.")
                 return
 
@@ -499,7 +1448,8 @@ class BankSystem:
             rate = float(input("Enter interest rate (e.g., 0.05 for 5%): "))
 
             loan = Loan(self.db, customer_id=customer_id, amount=amount, interest_rate=rate)
-            loan.save_new()
+            if loan.save_new():
+                print(f"Loan application submitted with ID {loan.loan_id}.")
 
             # Optional: Automatic approval for demonstration purposes
             if input("Approve loan now? (y/n): ").strip().lower() == 'y':
@@ -513,14 +1463,15 @@ class BankSystem:
         print("\n--- ISSUE CREDIT CARD ---")
         try:
             customer_id = int(input("Enter Customer ID for credit card: "))
-            if not Customer.load(self.db, customer_id):
+            if not Customer.exists(self.db, customer_id):
                 logging.warning("Credit card issuance failed: Customer ID not found.")
                 return
 
             credit_limit = float(input("Enter credit limit: "))
             
             card = CreditCard(self.db, customer_id=customer_id, credit_limit=credit_limit)
-            card.save_new()
+            if card.save_new():
+                print(f"Credit card issued with ID {card.card_id}.")
 
         except ValueError:
             logging.error("Invalid input. Please enter numerical values for ID and limit.")
@@ -612,7 +1563,31 @@ class BankSystem:
                 print("Invalid choice.")
 
 
+def build_arg_parser() -> argparse.ArgumentParser:
+    """Command-line interface: no command runs the interactive menu."""
+    parser = argparse.ArgumentParser(description="Bank management system.")
+    parser.add_argument('--db', default=DB_NAME, help="SQLite database file (default: %(default)s)")
+    subparsers = parser.add_subparsers(dest='command')
+    ingest = subparsers.add_parser('ingest', help="Bulk-load records from JSONL")
+    ingest.add_argument('entity', choices=['customers', 'accounts'])
+    ingest.add_argument('--jsonl', default='-', help="JSONL file to read, or '-' for stdin (default)")
+    ingest.add_argument('--chunk-size', type=int, default=INGEST_CHUNK_SIZE,
+                        help="Records per bulk insert (default: %(default)s)")
+    return parser
+
+
 if __name__ == '__main__':
-    # Initialize the system and run the interactive menu
-    bank = BankSystem()
-    bank.run_menu()
\ No newline at end of file
+    args = build_arg_parser().parse_args()
+    bank = BankSystem(args.db)
+    if args.command == 'ingest':
+        if args.jsonl == '-':
+            saved = bank.ingest(args.entity, sys.stdin, args.chunk_size)
+        else:
+            with open(args.jsonl, encoding='utf-8') as f:
+                saved = bank.ingest(args.entity, f, args.chunk_size)
+        bank.db.close()
+        # Non-zero exit status when the load was rolled back
+        sys.exit(0 if saved is not None else 1)
+    else:
+        # Initialize the system and run the interactive menu
+        bank.run_menu()
\ No newline at end of file